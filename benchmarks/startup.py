@@ -0,0 +1,256 @@
+"""Startup benchmark for the UKHO Tides integration.
+
+Records how long the integration's modules take to import, and the time from
+setting up the sensor platform until every entity has a state, for a cold
+start (nothing cached, predictions downloaded) and a warm start (predictions
+restored from the cache). A local fake API is used in place of the Admiralty
+one, so no API key is needed.
+
+Run from the root of the repo, with Home Assistant and ukhotides installed:
+
+    python benchmarks/startup.py --stations 1 500
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+import importlib.abc
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+from aiohttp import web
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# Home Assistant itself is already loaded by the time an integration is, so
+# only time the integration's own imports
+IMPORT_SCRIPT = """
+import sys, time
+import homeassistant.components.sensor
+import homeassistant.config_entries
+import homeassistant.helpers.aiohttp_client
+import homeassistant.helpers.config_validation
+import homeassistant.helpers.entity_registry
+import homeassistant.helpers.storage
+import homeassistant.helpers.update_coordinator
+
+start = time.perf_counter()
+import custom_components.ukho_tides
+import custom_components.ukho_tides.sensor
+import custom_components.ukho_tides.config_flow
+print(time.perf_counter() - start, "ukhotides" in sys.modules)
+"""
+
+
+def measure_import():
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    seconds, client_imported = result.stdout.split()
+
+    return float(seconds), client_imported == "True"
+
+
+class FakeApi:
+    def __init__(self, station_count):
+        self.station_ids = [f"{i:04d}" for i in range(1, station_count + 1)]
+        self.requests = 0
+        self._runner = None
+
+    def _tidal_events(self):
+        start = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        start = start - timedelta(days=1)
+
+        return [
+            {
+                "EventType": "HighWater" if i % 2 == 0 else "LowWater",
+                "DateTime": (start + timedelta(hours=6 * i)).isoformat(),
+                "Height": 4.0 if i % 2 == 0 else 1.0,
+            }
+            for i in range(32)
+        ]
+
+    async def _handle_stations(self, request):
+        self.requests += 1
+        return web.json_response(
+            {
+                "features": [
+                    {"properties": {"Id": s, "Name": f"Station {s}"}}
+                    for s in self.station_ids
+                ]
+            }
+        )
+
+    async def _handle_tidal_events(self, request):
+        self.requests += 1
+        return web.json_response(self._tidal_events())
+
+    async def async_start(self):
+        app = web.Application()
+        app.router.add_get("/api/V1/Stations", self._handle_stations)
+        app.router.add_get(
+            "/api/V1/Stations/{station_id}/TidalEvents", self._handle_tidal_events
+        )
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+
+        port = self._runner.addresses[0][1]
+        return f"http://127.0.0.1:{port}"
+
+    async def async_stop(self):
+        await self._runner.cleanup()
+
+
+class FakeEndpointFinder(importlib.abc.MetaPathFinder):
+    """Point ukhotides at the fake API whenever the integration imports it."""
+
+    def __init__(self, url):
+        self.url = url
+
+    def find_spec(self, name, path, target=None):
+        if name != "ukhotides":
+            return None
+
+        sys.meta_path.remove(self)
+        try:
+            spec = importlib.util.find_spec(name)
+        finally:
+            sys.meta_path.insert(0, self)
+
+        exec_module = spec.loader.exec_module
+
+        def exec_and_patch(module):
+            exec_module(module)
+            module.BASE_ENDPOINT = self.url
+
+        spec.loader.exec_module = exec_and_patch
+        return spec
+
+
+def unload_client_library():
+    for name in [m for m in sys.modules if m.split(".")[0] == "ukhotides"]:
+        del sys.modules[name]
+
+
+async def async_time_to_first_state(config_dir, api, entry_id):
+    from homeassistant.const import (
+        EVENT_HOMEASSISTANT_CLOSE,
+        EVENT_HOMEASSISTANT_FINAL_WRITE,
+    )
+    from homeassistant.core import HomeAssistant
+
+    from custom_components.ukho_tides import sensor
+    from custom_components.ukho_tides.const import (
+        CONF_STATION_ID,
+        CONF_STATION_NAME,
+        CONF_STATIONS,
+        DOMAIN,
+    )
+
+    hass = HomeAssistant(config_dir)
+    hass.data[DOMAIN] = {
+        entry_id: {
+            "api_key": "benchmark",
+            CONF_STATIONS: [
+                {CONF_STATION_ID: s, CONF_STATION_NAME: f"Station {s}"}
+                for s in api.station_ids
+            ],
+        }
+    }
+    background_tasks = []
+
+    def async_create_background_task(hass, target, name):
+        task = hass.async_create_background_task(target, name)
+        background_tasks.append(task)
+        return task
+
+    entry = SimpleNamespace(
+        entry_id=entry_id,
+        options={},
+        async_create_background_task=async_create_background_task,
+    )
+    entities = []
+    requests = api.requests
+
+    # Forget any earlier import, so we can tell whether this run needed the
+    # client library at all
+    unload_client_library()
+
+    start = time.perf_counter()
+
+    await sensor.async_setup_entry(hass, entry, entities.extend)
+
+    # Anything not restored from the cache only gets a state once the
+    # background refresh has finished
+    if any(e.state is None for e in entities):
+        await asyncio.gather(*background_tasks)
+
+    elapsed = time.perf_counter() - start
+
+    missing = sum(1 for e in entities if e.state is None)
+    await asyncio.gather(*background_tasks)
+    await hass.async_block_till_done()
+    client_imported = "ukhotides" in sys.modules
+
+    # The same events Home Assistant fires on shutdown, which flush the cache to
+    # disk ready for the next start and close the client session
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+    await hass.async_block_till_done()
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_CLOSE)
+    await hass.async_block_till_done()
+    await hass.async_stop()
+
+    return elapsed, missing, api.requests - requests, client_imported
+
+
+async def async_main(station_counts):
+    seconds, client_imported = measure_import()
+    print(
+        f"Import time: {seconds * 1000:.1f}ms "
+        f"(ukhotides imported: {client_imported})"
+    )
+
+    for station_count in station_counts:
+        api = FakeApi(station_count)
+        finder = FakeEndpointFinder(await api.async_start())
+        sys.meta_path.insert(0, finder)
+
+        try:
+            with tempfile.TemporaryDirectory() as config_dir:
+                for run in ("cold", "warm"):
+                    (
+                        elapsed,
+                        missing,
+                        requests,
+                        client_imported,
+                    ) = await async_time_to_first_state(config_dir, api, "benchmark")
+                    print(
+                        f"{station_count} stations, {run} start: "
+                        f"{elapsed * 1000:.1f}ms to first state, "
+                        f"{requests} API requests, {missing} entities without state, "
+                        f"ukhotides imported: {client_imported}"
+                    )
+        finally:
+            sys.meta_path.remove(finder)
+            await api.async_stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stations", type=int, nargs="+", default=[1, 500])
+    args = parser.parse_args()
+
+    asyncio.run(async_main(args.stations))
@@ -2,18 +2,108 @@ import asyncio
 import datetime
 import logging
 
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+import voluptuous as vol
 
-from .const import DOMAIN
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    ATTR_EXPORT_FILENAME,
+    ATTR_EXPORT_FORMAT,
+    CONF_STATION_ID,
+    CONF_STATIONS,
+    DATA_COORDINATORS,
+    DATA_FLUSH_CACHE,
+    DATA_REFRESH_TASK,
+    DATA_STORES,
+    DOMAIN,
+    EXPORT_FORMAT_CSV,
+    EXPORT_FORMAT_JSONL,
+    SERVICE_EXPORT_PREDICTIONS,
+    STORAGE_VERSION,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS = ["sensor"]
 
+EXPORT_PREDICTIONS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_EXPORT_FORMAT, default=EXPORT_FORMAT_CSV): vol.In(
+            [EXPORT_FORMAT_CSV, EXPORT_FORMAT_JSONL]
+        ),
+        vol.Optional(CONF_STATIONS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_EXPORT_FILENAME, default="predictions"): cv.slug,
+    }
+)
+
+
+def get_store(hass: HomeAssistant, entry_id: str) -> Store:
+    # One instance per entry, kept across reloads, so that a pending delayed
+    # save can be flushed or cancelled through the same store
+    stores = hass.data[DOMAIN].setdefault(DATA_STORES, {})
+
+    if entry_id not in stores:
+        stores[entry_id] = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+
+    return stores[entry_id]
+
 
 async def async_setup(hass: HomeAssistant, config: dict):
     hass.data.setdefault(DOMAIN, {})
+
+    async def async_export_predictions(call: ServiceCall):
+        from .export import iter_station_events, write_export
+
+        export_format = call.data[ATTR_EXPORT_FORMAT]
+        # An empty list, as sent by a cleared field, also means every station
+        station_ids = call.data.get(CONF_STATIONS) or None
+
+        coordinators = [
+            coordinator
+            for entry_data in hass.data[DOMAIN].values()
+            for coordinator in entry_data.get(DATA_COORDINATORS, [])
+            if station_ids is None
+            or coordinator.station[CONF_STATION_ID] in station_ids
+        ]
+
+        if station_ids is not None:
+            unmatched = set(station_ids) - {
+                c.station[CONF_STATION_ID] for c in coordinators
+            }
+
+            if not coordinators:
+                raise HomeAssistantError(
+                    f"No stations found matching: {', '.join(sorted(unmatched))}"
+                )
+
+            if unmatched:
+                _LOGGER.warning(
+                    "Stations not found, skipping: %s", ", ".join(sorted(unmatched))
+                )
+
+        path = hass.config.path(
+            DOMAIN, f"{call.data[ATTR_EXPORT_FILENAME]}.{export_format}"
+        )
+
+        _LOGGER.debug("Exporting %s stations to %s", len(coordinators), path)
+
+        # Rows are generated and written in the executor, straight from the
+        # coordinators' cached data, so no API calls are made here
+        await hass.async_add_executor_job(
+            write_export, path, export_format, iter_station_events(coordinators)
+        )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_PREDICTIONS,
+        async_export_predictions,
+        schema=EXPORT_PREDICTIONS_SCHEMA,
+    )
+
     return True
 
 
@@ -52,6 +142,26 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     hass.data[DOMAIN][entry.entry_id]["unsub_options_update_listener"]()
 
     if unload_ok:
+        entry_data = hass.data[DOMAIN][entry.entry_id]
+
+        if DATA_REFRESH_TASK in entry_data:
+            entry_data[DATA_REFRESH_TASK].cancel()
+
+        # Write the cache now rather than leaving a delayed save pending, so a
+        # reload picks up the latest predictions
+        if DATA_FLUSH_CACHE in entry_data:
+            await entry_data[DATA_FLUSH_CACHE]()
+
         hass.data[DOMAIN].pop(entry.entry_id)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    # Clean up the cached predictions, through the same store so that any
+    # pending save is cancelled too
+    hass.data.setdefault(DOMAIN, {})
+    store = get_store(hass, entry.entry_id)
+    hass.data[DOMAIN][DATA_STORES].pop(entry.entry_id)
+
+    await store.async_remove()
@@ -3,32 +3,125 @@ from copy import deepcopy
 import logging
 from typing import Any, Dict
 
-from aiohttp import ClientError
-from aiohttp.client_exceptions import ClientConnectorError
-from async_timeout import timeout
-from ukhotides import ApiError, ApiLevel, InvalidApiKeyError, Station, UkhoTides
 import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.const import CONF_API_KEY
 from homeassistant.core import callback
-from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers import entity_registry as er, selector
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 import homeassistant.helpers.config_validation as cv
 
 from .const import (
+    API_LEVEL_DEFAULT,
+    API_LEVELS,
     CONF_API_LEVEL,
     CONF_STATION_ID,
     CONF_STATION_NAME,
     CONF_STATION_OFFSET_HIGH,
     CONF_STATION_OFFSET_LOW,
     CONF_STATIONS,
+    CONF_STATIONS_IMPORT,
+    CONF_STATIONS_IMPORT_FILE,
     DEFAULT_NAME,
     DOMAIN,
 )
+from .exceptions import InvalidImport, UnknownStations
 
 _LOGGER = logging.getLogger(__name__)
 
+STATION_SETTINGS = [
+    CONF_STATION_NAME,
+    CONF_STATION_OFFSET_HIGH,
+    CONF_STATION_OFFSET_LOW,
+]
+
+IMPORT_SCHEMA = {
+    # Multiline, as pasting into a single line input loses the line breaks
+    vol.Optional(CONF_STATIONS_IMPORT): selector.TextSelector(
+        selector.TextSelectorConfig(multiline=True)
+    ),
+    vol.Optional(CONF_STATIONS_IMPORT_FILE): str,
+}
+
+
+async def async_get_stations(hass, api_key: str, api_level: str = None):
+    # The client library is only needed once a flow is actually run
+    from aiohttp import ClientError
+    from async_timeout import timeout
+    from ukhotides import ApiError, ApiLevel, InvalidApiKeyError, UkhoTides
+
+    errors = {}
+    stations = None
+    session = async_get_clientsession(hass)
+
+    try:
+        async with timeout(10):
+            if api_level is None:
+                ukhotides = UkhoTides(session, api_key)
+            else:
+                ukhotides = UkhoTides(session, api_key, ApiLevel[api_level])
+
+            stations = await ukhotides.async_get_stations()
+
+    except (ApiError, asyncio.TimeoutError, ClientError):
+        errors["base"] = "cannot_connect"
+    except InvalidApiKeyError:
+        errors[CONF_API_KEY] = "invalid_api_key"
+
+    except Exception:
+        _LOGGER.exception("Unexpected exception")
+        errors["base"] = "unknown"
+
+    return stations, errors
+
+
+def apply_station_settings(user_input: Dict[str, Any], stations: list) -> None:
+    # Form keys are "<setting>_<station id>", so match on the setting prefix and
+    # look the station up directly rather than scanning the list for every key
+    stations_by_id = {s[CONF_STATION_ID]: s for s in stations}
+
+    for key, value in user_input.items():
+        for setting in STATION_SETTINGS:
+            if key.startswith(setting + "_"):
+                station = stations_by_id.get(key[len(setting) + 1 :])
+
+                if station is not None:
+                    station[setting] = value
+                break
+
+
+async def async_import_stations(
+    hass, user_input: Dict[str, Any], stations_map: dict, existing_stations: list
+):
+    text = user_input.get(CONF_STATIONS_IMPORT)
+    path = user_input.get(CONF_STATIONS_IMPORT_FILE)
+
+    if not text and not path:
+        return None
+
+    from .station_import import parse_stations, read_import_file
+
+    if path:
+        text = await hass.async_add_executor_job(
+            read_import_file, hass.config.config_dir, path
+        )
+
+    existing = {s[CONF_STATION_ID]: s for s in existing_stations}
+
+    return await hass.async_add_executor_job(
+        parse_stations, text, stations_map, existing
+    )
+
+
+def import_errors(error: InvalidImport) -> Dict[str, str]:
+    _LOGGER.warning("Unable to import stations: %s", error)
+
+    if isinstance(error, UnknownStations):
+        return {"base": "unknown_station"}
+
+    return {"base": "invalid_import"}
+
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
@@ -38,31 +131,14 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         errors = {}
 
         if user_input is not None:
-            session = async_get_clientsession(self.hass)
-
-            try:
-                async with timeout(10):
-                    ukhotides = UkhoTides(
-                        session,
-                        user_input[CONF_API_KEY],
-                        ApiLevel[user_input[CONF_API_LEVEL]],
-                    )
-
-                    stations = await ukhotides.async_get_stations()
-
-                    self._all_stations = {s.id: s.name for s in stations}
-                    self._stations_map = {s.id: s for s in stations}
-
-            except (ApiError, ClientConnectorError, asyncio.TimeoutError, ClientError):
-                errors["base"] = "cannot_connect"
-            except InvalidApiKeyError:
-                errors[CONF_API_KEY] = "invalid_api_key"
+            stations, errors = await async_get_stations(
+                self.hass, user_input[CONF_API_KEY], user_input[CONF_API_LEVEL]
+            )
 
-            except Exception:
-                _LOGGER.exception("Unexpected exception")
-                errors["base"] = "unknown"
+            if not errors:
+                self._all_stations = {s.id: s.name for s in stations}
+                self._stations_map = {s.id: s for s in stations}
 
-            else:
                 self.data = user_input
                 self.data[CONF_STATIONS] = []
 
@@ -72,14 +148,8 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             step_id="user",
             data_schema=vol.Schema(
                 {
-                    vol.Required(
-                        CONF_API_LEVEL, default=ApiLevel.Discovery.name
-                    ): vol.In(
-                        [
-                            ApiLevel.Discovery.name,
-                            ApiLevel.Foundation.name,
-                            ApiLevel.Premium.name,
-                        ]
+                    vol.Required(CONF_API_LEVEL, default=API_LEVEL_DEFAULT): vol.In(
+                        API_LEVELS
                     ),
                     vol.Required(CONF_API_KEY): str,
                 }
@@ -91,22 +161,44 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         errors = {}
 
         if user_input is not None:
-            if not user_input[CONF_STATIONS]:
-                return self.async_create_entry(title=DEFAULT_NAME, data=self.data)
-
-            for station_id in user_input[CONF_STATIONS]:
-                station = self._stations_map[station_id]
-                self.data[CONF_STATIONS].append(
-                    {CONF_STATION_ID: station.id, CONF_STATION_NAME: station.name}
+            try:
+                imported_stations = await async_import_stations(
+                    self.hass, user_input, self._stations_map, []
                 )
+            except InvalidImport as error:
+                errors = import_errors(error)
+            else:
+                self.data[CONF_STATIONS] = []
+
+                for station_id in user_input.get(CONF_STATIONS) or []:
+                    station = self._stations_map[station_id]
+                    self.data[CONF_STATIONS].append(
+                        {CONF_STATION_ID: station.id, CONF_STATION_NAME: station.name}
+                    )
+
+                # Imported stations already carry their settings, so skip the
+                # per-station form altogether
+                if imported_stations is not None:
+                    imported_ids = {s[CONF_STATION_ID] for s in imported_stations}
+                    self.data[CONF_STATIONS] = [
+                        s
+                        for s in self.data[CONF_STATIONS]
+                        if s[CONF_STATION_ID] not in imported_ids
+                    ] + imported_stations
+
+                    return self.async_create_entry(title=DEFAULT_NAME, data=self.data)
 
-            return await self.async_step_station_settings()
+                if not self.data[CONF_STATIONS]:
+                    return self.async_create_entry(title=DEFAULT_NAME, data=self.data)
+
+                return await self.async_step_station_settings()
 
         return self.async_show_form(
             step_id="station",
             data_schema=vol.Schema(
                 {
                     vol.Optional(CONF_STATIONS): cv.multi_select(self._all_stations),
+                    **IMPORT_SCHEMA,
                 }
             ),
             errors=errors,
@@ -116,26 +208,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         errors = {}
 
         if user_input is not None:
-            for key in user_input:
-                station_id = key[key.rindex("_") + 1 :]
-
-                if "station_name" in key:
-                    for station in self.data[CONF_STATIONS]:
-                        if station[CONF_STATION_ID] == station_id:
-                            station[CONF_STATION_NAME] = user_input[key]
-                            break
-
-                if "station_offset_high" in key:
-                    for station in self.data[CONF_STATIONS]:
-                        if station[CONF_STATION_ID] == station_id:
-                            station[CONF_STATION_OFFSET_HIGH] = user_input[key]
-                            break
-
-                if "station_offset_low" in key:
-                    for station in self.data[CONF_STATIONS]:
-                        if station[CONF_STATION_ID] == station_id:
-                            station[CONF_STATION_OFFSET_LOW] = user_input[key]
-                            break
+            apply_station_settings(user_input, self.data[CONF_STATIONS])
 
             return self.async_create_entry(title=DEFAULT_NAME, data=self.data)
 
@@ -174,40 +247,27 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 class OptionsFlowHandler(config_entries.OptionsFlow):
     def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
         self.config_entry = config_entry
+        self._all_stations = None
+        self._stations_map = None
 
     async def async_step_init(
         self, user_input: Dict[str, Any] = None
     ) -> Dict[str, Any]:
         errors: Dict[str, str] = {}
 
-        session = async_get_clientsession(self.hass)
         self.data = self.hass.data[DOMAIN][self.config_entry.entry_id]
 
-        try:
-            async with timeout(10):
-                api_key = self.data[CONF_API_KEY]
-
-                ukhotides = UkhoTides(
-                    session,
-                    api_key,
-                )
-
-                # Get all stations
-                stations = await ukhotides.async_get_stations()
-
-                all_stations = {s.id: s.name for s in stations}
-                stations_map = {s.id: s for s in stations}
-
-        except (ApiError, ClientConnectorError, asyncio.TimeoutError, ClientError):
-            errors["base"] = "cannot_connect"
-        except InvalidApiKeyError:
-            errors[CONF_API_KEY] = "invalid_api_key"
+        # The catalogue is only fetched once per flow, not on every submit
+        if self._stations_map is None:
+            stations, errors = await async_get_stations(
+                self.hass, self.data[CONF_API_KEY]
+            )
 
-        except Exception:
-            _LOGGER.exception("Unexpected exception")
-            errors["base"] = "unknown"
+            if not errors:
+                self._all_stations = {s.id: s.name for s in stations}
+                self._stations_map = {s.id: s for s in stations}
 
-        else:
+        if not errors:
             # Get currently registered entities
             entity_registry = er.async_get(self.hass)
             registered_entities = er.async_entries_for_config_entry(
@@ -223,12 +283,28 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 e.entity_id: e.unique_id for e in registered_entities
             }
 
+            imported_stations = None
             if user_input is not None:
+                try:
+                    imported_stations = await async_import_stations(
+                        self.hass,
+                        user_input,
+                        self._stations_map,
+                        self.data[CONF_STATIONS],
+                    )
+                except InvalidImport as error:
+                    errors = import_errors(error)
+
+            if user_input is not None and not errors:
+                selected_ids = set(user_input.get(CONF_STATIONS) or [])
+                if imported_stations is not None:
+                    selected_ids.update(s[CONF_STATION_ID] for s in imported_stations)
+
                 # Remove any unchecked stations
                 removed_unique_ids = [
                     unique_id
                     for unique_id in registered_stations_entity_to_unique.values()
-                    if unique_id not in user_input[CONF_STATIONS]
+                    if unique_id not in selected_ids
                 ]
 
                 for unique_id in removed_unique_ids:
@@ -239,21 +315,17 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
 
                 # Add any newly checked stations
                 self.updated_stations = []
+                current_stations = {
+                    item[CONF_STATION_ID]: item for item in self.data[CONF_STATIONS]
+                }
                 if user_input.get(CONF_STATIONS):
                     for entry_unique_id in user_input[CONF_STATIONS]:
-                        s = next(
-                            (
-                                item
-                                for item in self.data[CONF_STATIONS]
-                                if item[CONF_STATION_ID] == entry_unique_id
-                            ),
-                            None,
-                        )
+                        s = current_stations.get(entry_unique_id)
 
                         if s is not None:
                             self.updated_stations.append(s)
                         else:
-                            s = stations_map[entry_unique_id]
+                            s = self._stations_map[entry_unique_id]
 
                             self.updated_stations.append(
                                 {
@@ -264,6 +336,21 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                                 }
                             )
 
+                # Imported stations already carry their settings, so skip the
+                # per-station form altogether
+                if imported_stations is not None:
+                    imported_ids = {s[CONF_STATION_ID] for s in imported_stations}
+                    self.updated_stations = [
+                        s
+                        for s in self.updated_stations
+                        if s[CONF_STATION_ID] not in imported_ids
+                    ] + imported_stations
+
+                    return self.async_create_entry(
+                        title="",
+                        data={CONF_STATIONS: self.updated_stations},
+                    )
+
                 if not errors:
                     if not self.updated_stations:
                         return self.async_create_entry(
@@ -278,7 +365,8 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 vol.Optional(
                     CONF_STATIONS,
                     default=list(registered_stations_unique_to_entity.keys()),
-                ): cv.multi_select(all_stations),
+                ): cv.multi_select(self._all_stations or {}),
+                **IMPORT_SCHEMA,
             }
         )
 
@@ -290,26 +378,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         errors = {}
 
         if user_input is not None:
-            for key in user_input:
-                station_id = key[key.rindex("_") + 1 :]
-
-                if "station_name" in key:
-                    for station in self.updated_stations:
-                        if station[CONF_STATION_ID] == station_id:
-                            station[CONF_STATION_NAME] = user_input[key]
-                            break
-
-                if "station_offset_high" in key:
-                    for station in self.updated_stations:
-                        if station[CONF_STATION_ID] == station_id:
-                            station[CONF_STATION_OFFSET_HIGH] = user_input[key]
-                            break
-
-                if "station_offset_low" in key:
-                    for station in self.updated_stations:
-                        if station[CONF_STATION_ID] == station_id:
-                            station[CONF_STATION_OFFSET_LOW] = user_input[key]
-                            break
+            apply_station_settings(user_input, self.updated_stations)
 
             return self.async_create_entry(
                 title="",
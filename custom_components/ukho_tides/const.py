@@ -7,8 +7,35 @@ CONF_STATIONS: str = "stations"
 CONF_STATION_NAME: str = "station_name"
 CONF_STATION_OFFSET_HIGH: str = "station_offset_high"
 CONF_STATION_OFFSET_LOW: str = "station_offset_low"
+CONF_STATIONS_IMPORT: str = "stations_import"
+CONF_STATIONS_IMPORT_FILE: str = "stations_import_file"
+
+API_LEVELS: list = ["Discovery", "Foundation", "Premium"]
+API_LEVEL_DEFAULT: str = "Discovery"
 
 UNDO_UPDATE_LISTENER: str = "undo_update_listener"
+DATA_COORDINATORS: str = "coordinators"
+DATA_PLATFORM: str = "platform"
+DATA_STORES: str = "stores"
+DATA_FLUSH_CACHE: str = "flush_cache"
+DATA_REFRESH_TASK: str = "refresh_task"
 ATTRIBUTION: str = "Data provided by UK Hydrographic Office"
 ATTR_ICON_RISING: str = "mdi:transfer-up"
 ATTR_ICON_FALLING: str = "mdi:transfer-down"
+
+SERVICE_EXPORT_PREDICTIONS: str = "export_predictions"
+ATTR_EXPORT_FORMAT: str = "format"
+ATTR_EXPORT_FILENAME: str = "filename"
+EXPORT_FORMAT_CSV: str = "csv"
+EXPORT_FORMAT_JSONL: str = "jsonl"
+EXPORT_FIELDS: list = [
+    "station_id",
+    "station_name",
+    "event_type",
+    "tidal_event_datetime",
+    "height",
+]
+
+STORAGE_VERSION: int = 1
+STORAGE_SAVE_DELAY: int = 30
+MAX_CONCURRENT_DOWNLOADS: int = 10
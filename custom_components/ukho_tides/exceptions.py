@@ -0,0 +1,13 @@
+from typing import List
+
+
+class InvalidImport(Exception):
+    pass
+
+
+class UnknownStations(InvalidImport):
+    def __init__(self, station_ids: List[str]):
+        # Only the count, as the ids may have come from any file in the config
+        # directory and shouldn't end up in the log
+        super().__init__(f"{len(station_ids)} station ids not found")
+        self.station_ids = station_ids
@@ -0,0 +1,78 @@
+import csv
+import io
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator
+
+from .const import (
+    CONF_STATION_ID,
+    CONF_STATION_NAME,
+    EXPORT_FIELDS,
+    EXPORT_FORMAT_CSV,
+)
+
+
+def iter_station_events(coordinators: Iterable[Any]) -> Iterator[Dict[str, Any]]:
+    # Walk the cached (already offset-adjusted) predictions lazily, one row at a
+    # time, so nothing proportional to the number of stations is built up.
+    # Each station's list is copied just before use as the coordinator may be
+    # updating it on the event loop meanwhile
+    for coordinator in coordinators:
+        station_id = coordinator.station[CONF_STATION_ID]
+
+        for p in list(coordinator.data or []):
+            yield {
+                CONF_STATION_ID: station_id,
+                CONF_STATION_NAME: coordinator.station_name,
+                "event_type": p["tidal_event"].event_type,
+                "tidal_event_datetime": p["tidal_event_datetime"].isoformat(),
+                "height": round(p["tidal_event"].height, 2),
+            }
+
+
+def iter_csv_lines(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+
+        # Reuse the same buffer rather than letting it grow with the export
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Flush the header if there were no rows at all
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_jsonl_lines(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row) + "\n"
+
+
+def write_export(
+    path: str, export_format: str, rows: Iterable[Dict[str, Any]]
+) -> None:
+    if export_format == EXPORT_FORMAT_CSV:
+        lines = iter_csv_lines(rows)
+    else:
+        lines = iter_jsonl_lines(rows)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Write to a temporary file first so consumers never see a partial export
+    tmp_path = path + ".tmp"
+
+    try:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            for line in lines:
+                f.write(line)
+
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
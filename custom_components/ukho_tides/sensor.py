@@ -1,11 +1,12 @@
+from __future__ import annotations
+
+import asyncio
 from datetime import datetime, timedelta, timezone
+from importlib import import_module
 import logging
 from operator import itemgetter
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 
-from aiohttp.client_exceptions import ClientConnectorError
-from async_timeout import timeout
-from ukhotides import ApiError, InvalidApiKeyError, TidalEvent, UkhoTides
 import voluptuous as vol
 
 from homeassistant import config_entries, core
@@ -21,6 +22,7 @@ from homeassistant.helpers.update_coordinator import (
     UpdateFailed,
 )
 
+from . import get_store
 from .const import (
     ATTR_ICON_FALLING,
     ATTR_ICON_RISING,
@@ -31,7 +33,13 @@ from .const import (
     CONF_STATION_OFFSET_HIGH,
     CONF_STATION_OFFSET_LOW,
     CONF_STATIONS,
+    DATA_COORDINATORS,
+    DATA_FLUSH_CACHE,
+    DATA_PLATFORM,
+    DATA_REFRESH_TASK,
     DOMAIN,
+    MAX_CONCURRENT_DOWNLOADS,
+    STORAGE_SAVE_DELAY,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -54,27 +62,68 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
 )
 
 
+class TidalEventRecord(NamedTuple):
+    # Same fields as ukhotides' TidalEvent, so that predictions can be restored
+    # from the cache without importing the client library
+    event_type: str
+    date_time: str
+    height: float
+
+
+def lazy_client(hass: HomeAssistant, api_key: str) -> Callable:
+    client = None
+    lock = asyncio.Lock()
+
+    async def async_get_client():
+        nonlocal client
+
+        # Only import the client library once something is downloaded, and do
+        # so in the executor to keep the import off the event loop. The lock
+        # stops every coordinator on a cold start making its own client
+        async with lock:
+            if client is None:
+                ukhotides = await hass.async_add_executor_job(
+                    import_module, "ukhotides"
+                )
+                client = ukhotides.UkhoTides(async_get_clientsession(hass), api_key)
+
+        return client
+
+    return async_get_client
+
+
 async def async_setup_platform(
     hass: HomeAssistant,
     config: ConfigType,
     async_add_entities: Callable,
     discovery_info: Optional[DiscoveryInfoType] = None,
 ) -> None:
-    session = async_get_clientsession(hass)
-    ukhotides = UkhoTides(session, config[CONF_API_KEY])
+    async_get_client = lazy_client(hass, config[CONF_API_KEY])
 
     sensors = []
 
+    # Stations from configuration.yaml have no config entry, so keep their
+    # coordinators to one side for the export service
+    hass.data.setdefault(DOMAIN, {})
+    platform_data = hass.data[DOMAIN].setdefault(DATA_PLATFORM, {})
+    coordinators = platform_data.setdefault(DATA_COORDINATORS, [])
+    download_limit = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+
     for station in config[CONF_STATIONS]:
-        coordinator = UkhoTidesDataUpdateCoordinator(hass, ukhotides, station)
+        coordinator = UkhoTidesDataUpdateCoordinator(
+            hass, async_get_client, station, download_limit=download_limit
+        )
+        coordinators.append(coordinator)
 
         if CONF_STATION_NAME in coordinator.station:
             name = station[CONF_STATION_NAME]
         else:
+            ukhotides = await async_get_client()
             name = (
                 await ukhotides.async_get_station(coordinator.station[CONF_STATION_ID])
             ).name
 
+        coordinator.station_name = name
         sensors.append(UkhoTidesSensor(coordinator, name))
 
     async_add_entities(sensors, update_before_add=True)
@@ -88,24 +137,67 @@ async def async_setup_entry(
     if entry.options:
         config.update(entry.options)
 
-    session = async_get_clientsession(hass)
-    ukhotides = UkhoTides(session, config[CONF_API_KEY])
+    async_get_client = lazy_client(hass, config[CONF_API_KEY])
+
+    # Predictions from the last run, so entities have a state before any
+    # network calls are made
+    store = get_store(hass, entry.entry_id)
+    cache = await store.async_load() or {}
 
     sensors = []
+    coordinators = config[DATA_COORDINATORS] = []
+    # Shared by the entry's coordinators so a cold start with many stations
+    # doesn't fire off every download at once
+    download_limit = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+
+    def cache_data():
+        return {c.station[CONF_STATION_ID]: c.as_cache() for c in coordinators}
+
+    def save_cache():
+        store.async_delay_save(cache_data, STORAGE_SAVE_DELAY)
+
+    async def async_flush_cache():
+        await store.async_save(cache_data())
+
+    config[DATA_FLUSH_CACHE] = async_flush_cache
 
     for station in config[CONF_STATIONS]:
-        coordinator = UkhoTidesDataUpdateCoordinator(hass, ukhotides, station)
+        coordinator = UkhoTidesDataUpdateCoordinator(
+            hass, async_get_client, station, save_cache, download_limit
+        )
+        coordinators.append(coordinator)
+
+        if station[CONF_STATION_ID] in cache:
+            coordinator.restore(cache[station[CONF_STATION_ID]])
 
         if CONF_STATION_NAME in coordinator.station:
             name = station[CONF_STATION_NAME]
         else:
+            ukhotides = await async_get_client()
             name = (
                 await ukhotides.async_get_station(coordinator.station[CONF_STATION_ID])
             ).name
 
+        coordinator.station_name = name
         sensors.append(UkhoTidesSensor(coordinator, name))
 
-    async_add_entities(sensors, update_before_add=True)
+    async_add_entities(sensors)
+
+    # Refresh in the background rather than holding up setup. The task is
+    # cancelled on unload. Restored predictions that are still fresh won't be
+    # downloaded again
+    async def async_refresh_all():
+        await asyncio.gather(*(c.async_refresh() for c in coordinators))
+
+    if hasattr(entry, "async_create_background_task"):
+        task = entry.async_create_background_task(
+            hass, async_refresh_all(), f"{DOMAIN} {entry.entry_id} refresh"
+        )
+    else:
+        # Older Home Assistant releases
+        task = hass.async_create_task(async_refresh_all())
+
+    config[DATA_REFRESH_TASK] = task
 
 
 class UkhoTidesSensor(CoordinatorEntity):
@@ -132,6 +224,9 @@ class UkhoTidesSensor(CoordinatorEntity):
 
         next_predictions = self.get_next_predictions()
 
+        if not next_predictions:
+            return None
+
         if next_predictions[0]["tidal_event"].event_type == "HighWater":
             return "Rising"
         else:
@@ -144,6 +239,9 @@ class UkhoTidesSensor(CoordinatorEntity):
 
         next_predictions = self.get_next_predictions()
 
+        if not next_predictions:
+            return None
+
         if next_predictions[0]["tidal_event"].event_type == "HighWater":
             return ATTR_ICON_RISING
         else:
@@ -194,7 +292,10 @@ class UkhoTidesSensor(CoordinatorEntity):
 
         return self._attrs
 
-    def get_next_predictions(self) -> [{datetime, TidalEvent}]:
+    def get_next_predictions(self) -> [{datetime, TidalEventRecord}]:
+        if self.coordinator.data is None:
+            return None
+
         now = datetime.utcnow().replace(tzinfo=timezone.utc)
         next_predictions = []
 
@@ -206,18 +307,90 @@ class UkhoTidesSensor(CoordinatorEntity):
 
 
 class UkhoTidesDataUpdateCoordinator(DataUpdateCoordinator):
-    def __init__(self, hass, ukhotides, station):
-        self._ukhotides = ukhotides
+    def __init__(
+        self, hass, async_get_client, station, save_cache=None, download_limit=None
+    ):
+        self._async_get_client = async_get_client
+        self._download_limit = download_limit or asyncio.Semaphore(
+            MAX_CONCURRENT_DOWNLOADS
+        )
         self._download_interval = timedelta(minutes=60)
         self._last_download_datetime = None
         self._data = []
+        self._save_cache = save_cache
         self.station = station
+        self.station_name = station.get(CONF_STATION_NAME, station[CONF_STATION_ID])
 
         update_interval = timedelta(minutes=1)
 
         super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=update_interval)
 
-    async def _async_update_data(self) -> List[TidalEvent]:
+    def as_cache(self) -> Dict[str, Any]:
+        # Store the events as downloaded, so any change to the offsets is still
+        # applied when they are restored
+        return {
+            "last_download": self._last_download_datetime.isoformat()
+            if self._last_download_datetime
+            else None,
+            "tidal_events": [
+                {
+                    "event_type": p["tidal_event"].event_type,
+                    "date_time": p["tidal_event"].date_time,
+                    "height": p["tidal_event"].height,
+                }
+                for p in self._data
+            ],
+        }
+
+    def restore(self, cache: Dict[str, Any]) -> None:
+        self._data = [
+            self._to_prediction(TidalEventRecord(**e)) for e in cache["tidal_events"]
+        ]
+        self._data.sort(key=itemgetter("tidal_event_datetime"))
+
+        if cache.get("last_download"):
+            self._last_download_datetime = datetime.fromisoformat(
+                cache["last_download"]
+            )
+
+        self.data = self._data
+
+    def _to_prediction(self, tidal_event) -> Dict[str, Any]:
+        tidal_event_datetime = datetime.strptime(
+            # Get just the stuff before any potential milliseconds
+            tidal_event.date_time.split(".")[0],
+            "%Y-%m-%dT%H:%M:%S",
+        )
+        # Convert to UTC
+        tidal_event_datetime = tidal_event_datetime.replace(tzinfo=timezone.utc)
+
+        # Add any offsets
+        if (
+            tidal_event.event_type == "HighWater"
+            and CONF_STATION_OFFSET_HIGH in self.station
+        ):
+            tidal_event_datetime = tidal_event_datetime + timedelta(
+                minutes=self.station[CONF_STATION_OFFSET_HIGH]
+            )
+
+        if (
+            tidal_event.event_type == "LowWater"
+            and CONF_STATION_OFFSET_LOW in self.station
+        ):
+            tidal_event_datetime = tidal_event_datetime + timedelta(
+                minutes=self.station[CONF_STATION_OFFSET_LOW]
+            )
+
+        # Downloaded events are kept as records too, so they compare equal to
+        # restored ones when removing duplicates
+        return {
+            "tidal_event_datetime": tidal_event_datetime,
+            "tidal_event": TidalEventRecord(
+                tidal_event.event_type, tidal_event.date_time, tidal_event.height
+            ),
+        }
+
+    async def _async_update_data(self) -> List[Dict[str, Any]]:
         now = datetime.utcnow().replace(tzinfo=timezone.utc)
 
         # As predictions rarely change, only refresh from the API infrequently
@@ -228,46 +401,20 @@ class UkhoTidesDataUpdateCoordinator(DataUpdateCoordinator):
         ):
             _LOGGER.debug("Re-downloading tide data")
 
+            ukhotides = await self._async_get_client()
+
+            from aiohttp.client_exceptions import ClientConnectorError
+            from async_timeout import timeout
+            from ukhotides import ApiError, InvalidApiKeyError
+
             try:
-                async with timeout(10):
-                    tidal_events = await self._ukhotides.async_get_tidal_events(
+                async with self._download_limit, timeout(10):
+                    tidal_events = await ukhotides.async_get_tidal_events(
                         self.station[CONF_STATION_ID]
                     )
 
                     for tidal_event in tidal_events:
-                        tidal_event_datetime = datetime.strptime(
-                            # Get just the stuff before any potential milliseconds
-                            tidal_event.date_time.split(".")[0],
-                            "%Y-%m-%dT%H:%M:%S",
-                        )
-                        # Convert to UTC
-                        tidal_event_datetime = tidal_event_datetime.replace(
-                            tzinfo=timezone.utc
-                        )
-
-                        # Add any offsets
-                        if (
-                            tidal_event.event_type == "HighWater"
-                            and CONF_STATION_OFFSET_HIGH in self.station
-                        ):
-                            tidal_event_datetime = tidal_event_datetime + timedelta(
-                                minutes=self.station[CONF_STATION_OFFSET_HIGH]
-                            )
-
-                        if (
-                            tidal_event.event_type == "LowWater"
-                            and CONF_STATION_OFFSET_LOW in self.station
-                        ):
-                            tidal_event_datetime = tidal_event_datetime + timedelta(
-                                minutes=self.station[CONF_STATION_OFFSET_LOW]
-                            )
-
-                        self._data.append(
-                            {
-                                "tidal_event_datetime": tidal_event_datetime,
-                                "tidal_event": tidal_event,
-                            }
-                        )
+                        self._data.append(self._to_prediction(tidal_event))
 
                     # Stack Overflow voodoo (comprehension) to get distinct events
                     self._data = [
@@ -295,4 +442,7 @@ class UkhoTidesDataUpdateCoordinator(DataUpdateCoordinator):
 
             self._last_download_datetime = now
 
+            if self._save_cache is not None:
+                self._save_cache()
+
         return self._data
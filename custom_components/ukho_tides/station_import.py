@@ -0,0 +1,133 @@
+import csv
+import os
+from typing import Any, Dict, List, Optional
+
+import voluptuous as vol
+import yaml
+
+from .const import (
+    CONF_STATION_ID,
+    CONF_STATION_NAME,
+    CONF_STATION_OFFSET_HIGH,
+    CONF_STATION_OFFSET_LOW,
+)
+from .exceptions import InvalidImport, UnknownStations
+
+IMPORT_STATION_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_STATION_ID): vol.All(vol.Coerce(str), vol.Strip),
+        vol.Optional(CONF_STATION_NAME): vol.Any(
+            None, vol.All(vol.Coerce(str), vol.Strip)
+        ),
+        vol.Optional(CONF_STATION_OFFSET_HIGH): vol.Coerce(int),
+        vol.Optional(CONF_STATION_OFFSET_LOW): vol.Coerce(int),
+    }
+)
+
+CSV_COLUMNS = [
+    CONF_STATION_ID,
+    CONF_STATION_NAME,
+    CONF_STATION_OFFSET_HIGH,
+    CONF_STATION_OFFSET_LOW,
+]
+
+
+def _parse_rows(text: str) -> List[Any]:
+    # A YAML list of mappings, eg. the stations block from configuration.yaml
+    try:
+        rows = yaml.safe_load(text)
+    except yaml.YAMLError:
+        rows = None
+
+    if isinstance(rows, list) and all(isinstance(r, dict) for r in rows):
+        return rows
+
+    # Otherwise treat it as CSV of id,name,high offset,low offset, or in the
+    # order given by a header line
+    rows = []
+    columns = None
+    for line, values in enumerate(csv.reader(text.splitlines()), start=1):
+        values = [v.strip() for v in values]
+
+        if not any(values) or values[0].startswith("#"):
+            continue
+
+        if columns is None and values[0] == CONF_STATION_ID:
+            unique = len(set(values)) == len(values)
+            if not unique or not set(values) <= set(CSV_COLUMNS):
+                raise InvalidImport(
+                    f"Line {line}: header columns must be unique and one of "
+                    f"{','.join(CSV_COLUMNS)}"
+                )
+
+            columns = values
+            continue
+
+        if columns is None:
+            columns = CSV_COLUMNS
+
+        if len(values) > len(columns):
+            raise InvalidImport(f"Line {line}: too many columns")
+
+        rows.append(
+            {column: value for column, value in zip(columns, values) if value != ""}
+        )
+
+    return rows
+
+
+def parse_stations(
+    text: str, stations_map: Dict[str, Any], existing: Optional[Dict] = None
+) -> List[Dict[str, Any]]:
+    existing = existing or {}
+    stations = {}
+    unknown = []
+
+    for number, row in enumerate(_parse_rows(text), start=1):
+        try:
+            station = IMPORT_STATION_SCHEMA(row)
+        except vol.Invalid as error:
+            raise InvalidImport(f"Station {number}: {error}") from error
+
+        station_id = station[CONF_STATION_ID]
+        catalogue_station = stations_map.get(station_id)
+
+        if catalogue_station is None:
+            unknown.append(station_id)
+            continue
+
+        # Anything left out keeps its current setting, or the default for a
+        # newly added station
+        current = existing.get(station_id, {})
+        if not station.get(CONF_STATION_NAME):
+            station[CONF_STATION_NAME] = current.get(
+                CONF_STATION_NAME, catalogue_station.name
+            )
+        for offset in (CONF_STATION_OFFSET_HIGH, CONF_STATION_OFFSET_LOW):
+            if offset not in station:
+                station[offset] = current.get(offset, 0)
+
+        # Later rows for the same station replace earlier ones
+        stations[station_id] = station
+
+    if unknown:
+        raise UnknownStations(unknown)
+
+    if not stations:
+        raise InvalidImport("No stations found")
+
+    return list(stations.values())
+
+
+def read_import_file(config_dir: str, path: str) -> str:
+    config_dir = os.path.realpath(config_dir)
+    path = os.path.realpath(os.path.join(config_dir, path))
+
+    if os.path.commonpath([config_dir, path]) != config_dir:
+        raise InvalidImport("Import file must be inside the config directory")
+
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    except OSError as error:
+        raise InvalidImport(str(error)) from error